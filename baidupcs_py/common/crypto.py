@@ -1,22 +1,32 @@
-from typing import Optional, Union, List, Tuple, IO, Any
-import re
+from typing import Optional, Union, List, Tuple, IO, Any, Callable
 import os
-import subprocess
+import io
 import random
+import mmap
 from abc import ABC, abstractmethod
-from zlib import crc32
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import hashlib
 from hashlib import md5, sha1
 
-from passlib.crypto.digest import pbkdf1
-
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.padding import PKCS7
 from cryptography.hazmat.backends import default_backend
 
+from baidupcs_py.common import constant
 from baidupcs_py.common.platform import IS_LINUX, IS_MACOS
 from baidupcs_py.common.simple_cipher import SimpleCryptography as _SimpleCryptography
 
+try:
+    # `fastcrc` calculates crc32 with SIMD instructions, which is much faster than `zlib`
+    from fastcrc import crc32 as _fastcrc32
+
+    def crc32(data: Any, value: int = 0) -> int:
+        return _fastcrc32.iso_hdlc(data, value)
+
+except ImportError:
+    from zlib import crc32  # type: ignore
+
 
 def _md5_cmd(localpath: str) -> List[str]:
     if IS_MACOS:
@@ -29,17 +39,20 @@ def _md5_cmd(localpath: str) -> List[str]:
 
 
 def calu_file_md5(localpath: str) -> str:
-    cp = subprocess.run(_md5_cmd(localpath), universal_newlines=True, stdout=subprocess.PIPE)
-
-    output = cp.stdout.strip()
-    if IS_MACOS:
-        return re.split(r"\s+", output)[-1]
-    elif IS_LINUX:
-        return re.split(r"\s+", output)[0]
-    else:  # windows
-        cn = output.split("CertUtil")[0].strip()
-        cn = cn.split(":")[-1].strip().replace(" ", "")
-        return cn
+    md5_v = md5()
+    with open(localpath, "rb") as fd:
+        mm = _mmap_stream(fd)
+        if mm is not None:
+            with mm, memoryview(mm) as buf:
+                md5_v.update(buf)
+        else:
+            buf = memoryview(bytearray(constant.OneM))
+            while True:
+                n = fd.readinto(buf)
+                if not n:
+                    break
+                md5_v.update(buf[:n])
+    return md5_v.hexdigest()
 
 
 def calu_md5(buf: Union[str, bytes], encoding="utf-8") -> str:
@@ -50,17 +63,75 @@ def calu_md5(buf: Union[str, bytes], encoding="utf-8") -> str:
     return md5(buf).hexdigest()
 
 
+# Only the bytes of these streams are the bytes of their `fileno()`.
+# Wrappers like `gzip.GzipFile` pass through the fileno of the underlying (compressed) file.
+_PLAIN_FILE_TYPES = (io.BufferedReader, io.BufferedRandom, io.FileIO)
+
+
+def _mmap_stream(stream: IO) -> Optional[mmap.mmap]:
+    """Map the file of `stream`, return None if the `stream` is not a mappable file"""
+
+    if type(stream) not in _PLAIN_FILE_TYPES:
+        return None
+
+    try:
+        if type(stream) is io.BufferedRandom:
+            # Write the buffered data to the file before mapping it
+            stream.flush()
+        return mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, TypeError, ValueError, OSError):
+        # Not a file, an empty file or a file which can not be mapped (e.g. pipe)
+        return None
+
+
 def calu_crc32_and_md5(stream: IO, chunk_size: int) -> Tuple[int, str]:
     md5_v = md5()
     crc32_v = 0
-    while True:
-        buf = stream.read(chunk_size)
-        if buf:
-            md5_v.update(buf)
-            crc32_v = crc32(buf, crc32_v).conjugate()
-        else:
-            break
-    return crc32_v.conjugate() & 0xFFFFFFFF, md5_v.hexdigest()
+
+    mm = _mmap_stream(stream)
+    if mm is not None:
+        # Hash the remains of the file at once from the mapped memory
+        with mm, ThreadPoolExecutor(max_workers=1) as executor:
+            with memoryview(mm)[stream.tell() :] as buf:
+                fut = executor.submit(md5_v.update, buf)
+                crc32_v = crc32(buf)
+                fut.result()
+        stream.seek(0, 2)
+        return crc32_v & 0xFFFFFFFF, md5_v.hexdigest()
+
+    # Smaller reads are bound by the Python call overhead
+    chunk_size = max(chunk_size, constant.OneM)
+
+    crc32_v, _ = update_crc32_and_md5(md5_v, stream.read(chunk_size), stream.read, chunk_size)
+    return crc32_v, md5_v.hexdigest()
+
+
+def update_crc32_and_md5(
+    md5_v: Any, first_buf: bytes, read: Callable[[int], bytes], chunk_size: int
+) -> Tuple[int, int]:
+    """Hash `first_buf` and the following chunks from `read` until it returns empty bytes
+
+    `md5_v` is a hashlib md5 object which is updated in place.
+    `read` is called with `chunk_size`, e.g. `io.read`.
+
+    Return the crc32 and the length of all the data.
+    """
+
+    crc32_v = 0
+    length = 0
+
+    # `md5.update` and `crc32` both release the GIL, so md5 is updated at a worker thread
+    # while crc32 is calculated and the next chunk is read at current thread.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        buf = first_buf
+        while buf:
+            fut = executor.submit(md5_v.update, buf)
+            crc32_v = crc32(buf, crc32_v)
+            length += len(buf)
+            next_buf = read(chunk_size)
+            fut.result()
+            buf = next_buf
+    return crc32_v & 0xFFFFFFFF, length
 
 
 def calu_sha1(buf: Union[str, bytes], encoding="utf-8") -> str:
@@ -75,8 +146,22 @@ U8_LIST = list(range(1 << 8))
 
 
 def random_bytes(size: int, seed: Any = None) -> bytes:
-    """Generate random bytes"""
+    """Generate random bytes
+
+    The bytes of a same seed are always the same, so they are cached.
+    """
+
+    if seed is None:
+        return bytes(random.Random().sample(U8_LIST, size))
+
+    try:
+        return _seeded_random_bytes(size, seed)
+    except TypeError:  # unhashable seed
+        return bytes(random.Random(seed).sample(U8_LIST, size))
+
 
+@lru_cache(maxsize=256)
+def _seeded_random_bytes(size: int, seed: Any) -> bytes:
     rg = random.Random(seed)
     return bytes(rg.sample(U8_LIST, size))
 
@@ -112,11 +197,10 @@ def padding_size(length: int, block_size: int, ceil: bool = True) -> int:
         block_size (int): the length of bytes, no the length of bit
     """
 
-    remainder = length % block_size
     if ceil:
-        return (block_size - remainder) * int(remainder != 0) + length
+        return length + (-length % block_size)
     else:
-        return length - remainder
+        return length - length % block_size
 
 
 def pkcs7_padding(data: bytes, block_size):
@@ -146,27 +230,27 @@ def generate_salt(size: int = 8) -> bytes:
 # Generate key and iv with password and salt
 # https://security.stackexchange.com/a/117654
 # {{{
+_KEY_IV_HASHERS = {
+    "md5": hashlib.md5,
+    "sha256": hashlib.sha256,
+    "sha512": hashlib.sha512,
+}
+
+
 def generate_key_iv(
     password: bytes, salt: bytes, key_size: int, iv_size: int, algo: str = "md5"
 ) -> Tuple[bytes, bytes]:
-    def hasher(algo: str, data: bytes) -> bytes:
-        hashes = {
-            "md5": hashlib.md5,
-            "sha256": hashlib.sha256,
-            "sha512": hashlib.sha512,
-        }
-        h = hashes[algo]()
-        h.update(data)
-        return h.digest()
+    hasher = _KEY_IV_HASHERS[algo]
 
     if algo == "md5":
-        temp = pbkdf1("md5", password, salt, 1, 16)
+        # PBKDF1 with 1 iteration is just `md5(password + salt)`
+        temp = md5(password + salt).digest()
     else:
         temp = b""
 
     fd = temp
     while len(fd) < key_size + iv_size:
-        temp = hasher(algo, temp + password + salt)
+        temp = hasher(temp + password + salt).digest()
         fd += temp
 
     key = fd[0:key_size]
@@ -225,7 +309,7 @@ class SimpleCryptography(Cryptography):
 class ChaCha20Cryptography(Cryptography):
     """ChaCha20 Cryptography
 
-    ChaCha20 stream algorithm.
+    ChaCha20 stream algorithm, the keystream is generated by OpenSSL.
 
     The decryption process does depend on previous decrypted data.
     """
@@ -236,6 +320,11 @@ class ChaCha20Cryptography(Cryptography):
 
         self._key = key
         self._nonce = nonce
+        self._cipher = Cipher(
+            algorithms.ChaCha20(self._key, self._nonce),
+            mode=None,
+            backend=default_backend(),
+        )
         self.reset()
 
     def encrypt(self, data: bytes) -> bytes:
@@ -245,13 +334,8 @@ class ChaCha20Cryptography(Cryptography):
         return self._decryptor.update(data)
 
     def reset(self):
-        cipher = Cipher(
-            algorithms.ChaCha20(self._key, self._nonce),
-            mode=None,
-            backend=default_backend(),
-        )
-        self._encryptor = cipher.encryptor()
-        self._decryptor = cipher.decryptor()
+        self._encryptor = self._cipher.encryptor()
+        self._decryptor = self._cipher.decryptor()
 
     def finalize(self):
         self._encryptor.finalize()
@@ -266,6 +350,7 @@ class AES256CBCCryptography(Cryptography):
         self._key = key
         self._iv = iv
         self._mode = modes.CBC(iv)
+        self._cipher = Cipher(algorithms.AES(self._key), mode=self._mode)
         self.reset()
 
     def encrypt(self, data: bytes) -> bytes:
@@ -276,9 +361,8 @@ class AES256CBCCryptography(Cryptography):
         return self._decryptor.update(data)
 
     def reset(self):
-        cipher = Cipher(algorithms.AES(self._key), mode=self._mode)
-        self._encryptor = cipher.encryptor()
-        self._decryptor = cipher.decryptor()
+        self._encryptor = self._cipher.encryptor()
+        self._decryptor = self._cipher.decryptor()
 
     def finalize(self):
         self._encryptor.finalize()
@@ -11,18 +11,19 @@ from typing import (
     cast,
     AnyStr,
 )
-from io import BytesIO, UnsupportedOperation
+from io import BytesIO, BufferedReader, BufferedRandom, FileIO, UnsupportedOperation
 from enum import Enum
 from pathlib import Path
-from zlib import crc32
 from random import Random
 import os
 import hashlib
+import mmap
+import stat
+import struct
 import logging
 import time
 
 from baidupcs_py.common import constant
-from baidupcs_py.common.number import u64_to_u8x8, u8x8_to_u64
 from baidupcs_py.common.crypto import (
     random_bytes,
     random_sys_bytes,
@@ -39,7 +40,8 @@ from baidupcs_py.common.crypto import (
     generate_salt,
     generate_key_iv,
     calu_md5,
-    calu_crc32_and_md5,
+    crc32,
+    update_crc32_and_md5,
 )
 from baidupcs_py.common.log import TLogLevel, LogLevels, get_logger
 
@@ -51,7 +53,7 @@ if _LOG_LEVEL not in LogLevels:
     _LOG_LEVEL = "CRITICAL"
 logger = get_logger(__name__, level=cast(TLogLevel, _LOG_LEVEL))
 
-READ_SIZE = 65535
+READ_SIZE = constant.OneM
 
 # This is the threshold of range request setted by Baidu server
 MAX_CHUNK_SIZE = 50 * constant.OneM
@@ -61,6 +63,9 @@ ENCRYPT_HEAD_LEN = len(BAIDUPCS_PY_CRYPTO_MAGIC_CODE) + 1 + 16 + 8
 PADDED_ENCRYPT_HEAD_LEN = padding_size(ENCRYPT_HEAD_LEN, 16)
 PADDED_ENCRYPT_HEAD_WITH_SALT_LEN = PADDED_ENCRYPT_HEAD_LEN + 8
 
+# magic code, encrypt algorithm code, salt (+ random padding) or nonce_or_iv, total_origin_len
+_HEAD_STRUCT = struct.Struct(f">{len(BAIDUPCS_PY_CRYPTO_MAGIC_CODE)}s1s16sQ")
+
 
 def total_len(o: Any) -> int:
     """Read obj len"""
@@ -96,6 +101,8 @@ def total_len(o: Any) -> int:
 class ChunkIO(IO):
     """Wrap a IO, only read `size` bytes"""
 
+    __slots__ = ("_io", "_size", "_offset", "_io_offset")
+
     def __init__(self, io: IO, size: int):
         self._io = io
         self._size = size
@@ -106,15 +113,12 @@ class ChunkIO(IO):
         return self._size
 
     def read(self, size: int = -1) -> Optional[bytes]:
-        remain = self._size - self._offset
-        if size == -1:
-            size = remain
-        else:
-            size = min(size, remain)
+        offset = self._offset
+        remain = self._size - offset
+        size = remain if size < 0 else (size if size < remain else remain)
 
         data = self._io.read(size) or b""
-        if data:
-            self._offset += len(data)
+        self._offset = offset + len(data)
         return data
 
     def seek(self, offset: int, whence: int = 0) -> int:
@@ -149,62 +153,83 @@ class ChunkIO(IO):
         pass
 
 
+# Only the bytes of these ios are the bytes of their `fileno()`.
+# Wrappers like `gzip.GzipFile` pass through the fileno of the underlying (compressed) file,
+# and `SpooledTemporaryFile.fileno()` rolls the data over to disk.
+_PLAIN_FILE_TYPES = (BufferedReader, BufferedRandom, FileIO)
+
+
+def _regular_fileno(io: IO) -> Optional[int]:
+    """Return the file descriptor of `io` if it is a plain regular file"""
+
+    if type(io) not in _PLAIN_FILE_TYPES:
+        return None
+
+    try:
+        fileno = io.fileno()
+    except (AttributeError, UnsupportedOperation):
+        return None
+
+    if not stat.S_ISREG(os.fstat(fileno).st_mode):
+        return None
+
+    if type(io) is BufferedRandom:
+        # Write the buffered data to the file before reading it with `os.pread`
+        io.flush()
+    return fileno
+
+
 def sample_data(io: IO, rg: Random, size: int) -> bytes:
     """Sample data with size"""
 
+    # `os.pread` reads at the offset without moving the io position,
+    # so there is no need to seek back and forth for each byte.
+    fileno = _regular_fileno(io) if hasattr(os, "pread") else None
+    if fileno is not None:
+        _len = os.fstat(fileno).st_size
+        return b"".join(os.pread(fileno, 1, rg.randint(0, max(0, _len - 1))) for _ in range(size))
+
     _len = io.seek(0, 2)
-    data = b""
+    data = []
     for _ in range(size):
         i = rg.randint(0, max(0, _len - 1))
         io.seek(i, 0)
-        data += io.read(1)
+        data.append(io.read(1))
     io.seek(0, 0)
-    return data
+    return b"".join(data)
 
 
 def rapid_upload_params(io: IO) -> Tuple[str, str, int, int]:
-    io_len = 0
     chunk_size = constant.OneM
-    crc32_v = 0
     md5_v = hashlib.md5()
 
     buf = io.read(256 * constant.OneK)
-    io_len += len(buf)
     slice_md5 = calu_md5(buf)
-    md5_v.update(buf)
-    t = io.read(chunk_size - 256 * constant.OneK)
-    io_len += len(t)
-    md5_v.update(t)
-    buf += t
-    crc32_v = crc32(buf, crc32_v).conjugate()
-
-    # content_crc32, content_md5 = calu_crc32_and_md5(io, constant.OneM)
-
-    while True:
-        buf = io.read(chunk_size)
-        if buf:
-            md5_v.update(buf)
-            crc32_v = crc32(buf, crc32_v).conjugate()
-            io_len += len(buf)
-        else:
-            break
+    buf += io.read(chunk_size - 256 * constant.OneK)
 
-    content_crc32, content_md5 = crc32_v.conjugate() & 0xFFFFFFFF, md5_v.hexdigest()
+    # All hashes are calculated in the one pass of reading (and encrypting) `io`
+    content_crc32, io_len = update_crc32_and_md5(md5_v, buf, io.read, chunk_size)
 
-    # if isinstance(io, EncryptIO):
-    #     io_len = len(io)
-    # else:
-    #     io_len = io.seek(0, 2)
-    #     io.seek(0, 0)
-
-    return slice_md5, content_md5, content_crc32, io_len
+    return slice_md5, md5_v.hexdigest(), content_crc32, io_len
 
 
 def rapid_upload_params2(localPath: Path) -> Tuple[str, str, int, int]:
-    buf = localPath.open("rb").read(constant.OneM)
-    slice_md5 = calu_md5(buf[: 256 * constant.OneK])
-    content_crc32, content_md5 = calu_crc32_and_md5(localPath.open("rb"), constant.OneM)
-    return slice_md5, content_md5, content_crc32, localPath.stat().st_size
+    with localPath.open("rb") as fd:
+        try:
+            mm = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Empty files and non-regular files (e.g. named pipes) can not be mapped
+            return rapid_upload_params(fd)
+
+        with mm:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+
+            # Hash the whole mapped file at once, the OS handles the paging
+            slice_md5 = calu_md5(mm[: 256 * constant.OneK])
+            content_md5 = hashlib.md5(mm).hexdigest()
+            content_crc32 = crc32(mm) & 0xFFFFFFFF
+            return slice_md5, content_md5, content_crc32, len(mm)
 
 
 def generate_nonce_or_iv(salt: bytes, io: IO) -> bytes:
@@ -221,6 +246,23 @@ class EncryptIO(IO):
     Block cipher needs to imply by itself.
     """
 
+    __slots__ = (
+        "_io",
+        "_io_len",
+        "_offset",
+        "_total_origin_len",
+        "_encrypt_password",
+        "_salt_for_head",
+        "_encrypt_key_for_head",
+        "_iv_for_head",
+        "_salt",
+        "_encrypt_key",
+        "_nonce_or_iv",
+        "_crypto",
+        "_total_head",
+        "_total_head_len",
+    )
+
     def __init__(self, io: IO, encrypt_password: bytes, total_origin_len: int):
         self._io = io
 
@@ -249,8 +291,9 @@ class EncryptIO(IO):
         # Instantiated at each subclass, here is for mypy
         self._crypto: Cryptography
 
-        self._total_head: bytes
-        self._total_head_len = len(self.total_head)
+        # The encrypted head is built lazily at the first read of it
+        self._total_head: Optional[bytes] = None
+        self._total_head_len = PADDED_ENCRYPT_HEAD_WITH_SALT_LEN
 
     def magic_code(self) -> bytes:
         raise NotImplementedError()
@@ -292,7 +335,7 @@ class EncryptIO(IO):
         `salt 8bytes`
         """
 
-        if hasattr(self, "_total_head"):
+        if self._total_head is not None:
             return self._total_head
 
         assert len(self._salt) == 8
@@ -302,7 +345,7 @@ class EncryptIO(IO):
             + self.magic_code()
             + self._salt
             + random_sys_bytes(8)
-            + u64_to_u8x8(self._total_origin_len),
+            + self._total_origin_len.to_bytes(8, "big"),
             PADDED_ENCRYPT_HEAD_LEN,
             value=b"",
         )
@@ -319,23 +362,32 @@ class EncryptIO(IO):
     def read(self, size: int = -1) -> Optional[bytes]:
         """The read only imply to stream cipher"""
 
-        if self._offset < self._total_head_len:
+        offset = self._offset
+        io_read = self._io.read
+        encrypt = self._crypto.encrypt
+
+        if offset < self._total_head_len:
             if size < 0:
-                data = self.total_head[self._offset :]
-                io_buf = self._io.read()
-                data += self._crypto.encrypt(io_buf)
+                data = self.total_head[offset:]
+                data += encrypt(io_read())
             else:
-                data = self.total_head[self._offset : self._offset + size]
+                data = self.total_head[offset : offset + size]
                 size -= len(data)
                 if size > 0:
-                    io_buf = self._io.read(size)
-                    data += self._crypto.encrypt(io_buf)
+                    data += encrypt(io_read(size))
         else:
-            io_buf = self._io.read(size)
-            data = self._crypto.encrypt(io_buf)
-        self._offset += len(data)
+            data = encrypt(io_read(size))
+        self._offset = offset + len(data)
         return data
 
+    def readinto(self, buffer: Any) -> int:
+        """Read encrypted data into `buffer`, return the number of bytes read"""
+
+        data = self.read(len(buffer))
+        n = len(data)
+        buffer[:n] = data
+        return n
+
     def seek(self, offset: int, whence: int = 0) -> int:
         if not self.seekable() and offset == 0 and whence == 0 and self._total_head_len > 0:
             self._crypto.reset()
@@ -381,6 +433,8 @@ class EncryptIO(IO):
 
 
 class SimpleEncryptIO(EncryptIO):
+    __slots__ = ()
+
     MAGIC_CODE = b"\x00"
 
     BLOCK_SIZE = 16  # 16 bytes
@@ -397,6 +451,8 @@ class SimpleEncryptIO(EncryptIO):
 
 
 class ChaCha20EncryptIO(EncryptIO):
+    __slots__ = ()
+
     MAGIC_CODE = b"\x01"
 
     BLOCK_SIZE = 16  # 16 bytes
@@ -419,10 +475,22 @@ class ChaCha20EncryptIO(EncryptIO):
 
 
 class AES256CBCEncryptIO(EncryptIO):
+    __slots__ = (
+        "_origin_io_offset",
+        "_origin_cache",
+        "_origin_cache_len",
+        "_encrypted_io_len",
+        "_encrypted_cache",
+        "_need_data_padded",
+    )
+
     MAGIC_CODE = b"\x02"
 
     BLOCK_SIZE = 16  # 16 bytes
 
+    # The least size of content to pass to the cipher at once, small reads are served from the cache
+    CHUNK_SIZE = 32 * constant.OneK
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -431,7 +499,11 @@ class AES256CBCEncryptIO(EncryptIO):
         # The offset of encrypted origin content
         self._origin_io_offset = 0
         # Origin content cache
-        self._origin_cache = bytearray()
+        #
+        # A reusable buffer, `self._origin_cache[:self._origin_cache_len]` is
+        # the origin content which is not encrypted yet.
+        self._origin_cache = bytearray(self.BLOCK_SIZE)
+        self._origin_cache_len = 0
 
         # Total length of final encrypted content
         self._encrypted_io_len = padding_size(self._io_len, self.BLOCK_SIZE)
@@ -449,8 +521,8 @@ class AES256CBCEncryptIO(EncryptIO):
     def reset(self):
         super().reset()
         self._origin_io_offset = 0
-        self._origin_cache = bytearray()
-        self._encrypted_cache = bytearray()
+        self._origin_cache_len = 0
+        self._encrypted_cache.clear()
 
     def __len__(self):
         """Encrypted content length"""
@@ -460,72 +532,94 @@ class AES256CBCEncryptIO(EncryptIO):
     def _read_block(self, size: int = -1):
         """Read encrypted block to cache"""
 
+        encrypted_cache = self._encrypted_cache
+
         # `self._encrypted_cache` has remains.
-        if size > 0 and len(self._encrypted_cache) > size:
+        if size > 0 and len(encrypted_cache) > size:
             return
 
+        block_size = self.BLOCK_SIZE
+
         # `size` must be large or equal to the `size` as `size` be the times of `self.BLOCK_SIZE`
         if size > 0:
-            size = padding_size(size, self.BLOCK_SIZE)
+            size = padding_size(max(size, self.CHUNK_SIZE), block_size)
+
+        origin_cache = self._origin_cache
+        origin_cache_len = self._origin_cache_len
+
+        readinto = getattr(self._io, "readinto", None)
+        if size > 0 and readinto is not None:
+            # Read origin content into the cache right after the remains, no extra copy
+            if len(origin_cache) < origin_cache_len + size:
+                origin_cache.extend(bytes(origin_cache_len + size - len(origin_cache)))
+            data_len = readinto(memoryview(origin_cache)[origin_cache_len : origin_cache_len + size]) or 0
+            buf = origin_cache
+        else:
+            data = self._io.read(size) or b""
+            data_len = len(data)
+            buf = origin_cache[:origin_cache_len] + data
 
-        data = self._io.read(size) or b""
-        if not data:
+        if not data_len:
             return
 
-        self._origin_io_offset += len(data)
-        self._origin_cache.extend(data)
+        origin_io_offset = self._origin_io_offset + data_len
+        self._origin_io_offset = origin_io_offset
 
-        avail_ori_len = padding_size(len(self._origin_cache), self.BLOCK_SIZE, ceil=False)
-        if avail_ori_len > 0:
-            ori_cn = self._origin_cache[:avail_ori_len]
-            self._origin_cache = self._origin_cache[avail_ori_len:]
-        else:
-            ori_cn = b""
+        buf_len = origin_cache_len + data_len
+        crypto = self._crypto
 
         # The end encryption
-        if self._origin_io_offset == self._total_origin_len:
+        if origin_io_offset == self._total_origin_len:
             # Take all remainder
-            if self._origin_cache:
-                ori_cn += bytes(self._origin_cache)
-                self._origin_cache.clear()
+            ori_cn = memoryview(buf)[:buf_len]
+            self._origin_cache_len = 0
 
             # Padding
             if self._need_data_padded:
-                ori_cn = pkcs7_padding(ori_cn, self.BLOCK_SIZE)
+                ori_cn = pkcs7_padding(bytes(ori_cn), block_size)
 
-            enc_cn = self._crypto.encrypt(ori_cn)
-            self._crypto.finalize()
+            enc_cn = crypto.encrypt(ori_cn)
+            crypto.finalize()
         else:
-            enc_cn = self._crypto.encrypt(ori_cn)
+            avail_ori_len = padding_size(buf_len, block_size, ceil=False)
+            enc_cn = crypto.encrypt(memoryview(buf)[:avail_ori_len])
+
+            # Move the unaligned remains to the front of the cache
+            remain_len = buf_len - avail_ori_len
+            origin_cache[:remain_len] = buf[avail_ori_len:buf_len]
+            self._origin_cache_len = remain_len
 
-        self._encrypted_cache.extend(enc_cn)
+        encrypted_cache.extend(enc_cn)
 
     def _takeout(self, size: int = -1) -> bytes:
         """Take out from encrypted cache"""
 
         self._read_block(size)
 
+        encrypted_cache = self._encrypted_cache
         if size < 0:
-            data = bytes(self._encrypted_cache)
-            self._encrypted_cache.clear()
+            data = bytes(encrypted_cache)
+            encrypted_cache.clear()
         else:
-            data = bytes(self._encrypted_cache[:size])
-            self._encrypted_cache = self._encrypted_cache[size:]
+            data = bytes(encrypted_cache[:size])
+            del encrypted_cache[:size]
         return data
 
     def read(self, size: int = -1) -> Optional[bytes]:
-        if self._offset < self._total_head_len:
+        offset = self._offset
+
+        if offset < self._total_head_len:
             if size < 0:
-                data = self.total_head[self._offset :]
+                data = self.total_head[offset:]
                 data += self._takeout()
             else:
-                data = self.total_head[self._offset : self._offset + size]
+                data = self.total_head[offset : offset + size]
                 size -= len(data)
                 if size > 0:
                     data += self._takeout(size)
         else:
             data = self._takeout(size)
-        self._offset += len(data)
+        self._offset = offset + len(data)
         return data
 
     def seekable(self) -> bool:
@@ -533,9 +627,27 @@ class AES256CBCEncryptIO(EncryptIO):
 
 
 class DecryptIO(IO):
+    __slots__ = (
+        "_io",
+        "_io_init_offset",
+        "_io_len",
+        "_offset",
+        "_encrypt_key",
+        "_nonce_or_iv",
+        "_total_origin_len",
+        "_total_head_len",
+        "_crypto",
+        "_io_read",
+    )
+
     def __init__(self, io: IO, encrypt_key: bytes, nonce_or_iv: bytes, total_origin_len: int):
         self._io = io
 
+        # Bound `self._io.read`, it is looked up once instead of at each read
+        #
+        # When `self.set_io` be called, the `_io_read` must be set to `io.read`
+        self._io_read = io.read
+
         # The offset after ENCRYPT_HEAD_LEN
         # Must be equal ENCRYPT_HEAD_LEN
         #
@@ -567,17 +679,24 @@ class DecryptIO(IO):
 
     def set_io(self, io: IO):
         self._io = io
+        self._io_read = io.read
         self._io_init_offset = io.tell()
         self._offset = 0
         self._io_len = total_len(self._io)
 
     def read(self, size: int = -1) -> Optional[bytes]:
-        data = self._io.read(size)
+        data = self._io_read(size)
         if not data:
             return b""
         self._offset += len(data)
         return data
 
+    def decrypt_bytes(self, data: bytes) -> bytes:
+        """Decrypt the next continuous encrypted `data` directly, without wrapping it with an io"""
+
+        self._offset += len(data)
+        return data
+
     def seek(self, offset: int, whence: int = 0) -> int:
         # ChaCha20 and AES are depended on previous decrypted
         if not self.seekable():
@@ -612,23 +731,32 @@ class DecryptIO(IO):
 
 
 class SimpleDecryptIO(DecryptIO):
+    __slots__ = ("_decrypt",)
+
     def __init__(self, io: IO, encrypt_key: bytes, nonce: bytes, total_origin_len: int):
         super().__init__(io, encrypt_key, nonce, total_origin_len)
 
         self._crypto = SimpleCryptography(self._encrypt_key + self._nonce_or_iv)
+        self._decrypt = self._crypto.decrypt
 
     def read(self, size: int = -1) -> Optional[bytes]:
-        data = self._io.read(size)
+        data = self._io_read(size)
         if not data:
             return b""
         self._offset += len(data)
-        return self._crypto.decrypt(data)
+        return self._decrypt(data)
+
+    def decrypt_bytes(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return self._decrypt(data)
 
     def seekable(self) -> bool:
         return True
 
 
 class ChaCha20DecryptIO(DecryptIO):
+    __slots__ = ("_decrypt",)
+
     BLOCK_SIZE = 16  # 16 bytes
 
     def __init__(self, io: IO, encrypt_key: bytes, nonce: bytes, total_origin_len: int):
@@ -637,21 +765,37 @@ class ChaCha20DecryptIO(DecryptIO):
         super().__init__(io, encrypt_key, nonce, total_origin_len)
 
         self._crypto = ChaCha20Cryptography(self._encrypt_key, self._nonce_or_iv)
+        self._decrypt = self._crypto.decrypt
 
     def read(self, size: int = -1) -> Optional[bytes]:
-        data = self._io.read(size)
+        data = self._io_read(size)
         if not data:
             return b""
         self._offset += len(data)
-        return self._crypto.decrypt(data)
+        return self._decrypt(data)
+
+    def decrypt_bytes(self, data: bytes) -> bytes:
+        self._offset += len(data)
+        return self._decrypt(data)
 
     def seekable(self) -> bool:
         return False
 
 
 class AES256CBCDecryptIO(DecryptIO):
+    __slots__ = (
+        "_encrypted_io_offset",
+        "_encrypted_io_len",
+        "_encrypted_data_padded",
+        "_encrypted_cache",
+        "_decrypted_cache",
+    )
+
     BLOCK_SIZE = 16  # 16 bytes
 
+    # The least size of content to pass to the cipher at once, small reads are served from the cache
+    CHUNK_SIZE = 32 * constant.OneK
+
     def __init__(self, io: IO, encrypt_key: bytes, iv: bytes, total_origin_len: int):
         encrypt_key = padding_key(encrypt_key, self.BLOCK_SIZE * 2)
         iv = padding_key(iv, self.BLOCK_SIZE)
@@ -675,54 +819,80 @@ class AES256CBCDecryptIO(DecryptIO):
     def _read_block(self, size: int = -1):
         """Read encrypted block to cache"""
 
+        decrypted_cache = self._decrypted_cache
+
         # `self._decrypted_cache` has remains.
-        if size > 0 and len(self._decrypted_cache) > size:
+        if size > 0 and len(decrypted_cache) > size:
             return
 
+        block_size = self.BLOCK_SIZE
+
         # `size` must be large or equal to the `size` as `size` be the times of `self.BLOCK_SIZE`
         if size > 0:
-            size = padding_size(size, self.BLOCK_SIZE)
+            size = padding_size(max(size, self.CHUNK_SIZE), block_size)
 
         data = self._io.read(size)
         if not data:
             return
 
-        self._encrypted_io_offset += len(data)
-        self._encrypted_cache.extend(data)
+        self._decrypt_block(data)
 
-        avail_enc_len = padding_size(len(self._encrypted_cache), self.BLOCK_SIZE, ceil=False)
+    def _decrypt_block(self, data: bytes):
+        """Decrypt the continuous encrypted `data` to cache"""
+
+        block_size = self.BLOCK_SIZE
+
+        encrypted_io_offset = self._encrypted_io_offset + len(data)
+        self._encrypted_io_offset = encrypted_io_offset
+
+        encrypted_cache = self._encrypted_cache
+        encrypted_cache.extend(data)
+
+        avail_enc_len = padding_size(len(encrypted_cache), block_size, ceil=False)
         if avail_enc_len > 0:
-            enc_cn = bytes(self._encrypted_cache[:avail_enc_len])
-            self._encrypted_cache = self._encrypted_cache[avail_enc_len:]
+            enc_cn = bytes(encrypted_cache[:avail_enc_len])
+            del encrypted_cache[:avail_enc_len]
         else:
             enc_cn = b""
 
+        crypto = self._crypto
+
         # The end decryption
-        if self._encrypted_io_offset == self._encrypted_io_len:
-            if self._encrypted_cache:
-                enc_cn += bytes(self._encrypted_cache)
-                self._encrypted_cache.clear()
+        if encrypted_io_offset == self._encrypted_io_len:
+            if encrypted_cache:
+                enc_cn += bytes(encrypted_cache)
+                encrypted_cache.clear()
 
-            dec_cn = self._crypto.decrypt(enc_cn)
+            dec_cn = crypto.decrypt(enc_cn)
 
             if self._encrypted_data_padded:
-                dec_cn = pkcs7_unpadding(dec_cn, self.BLOCK_SIZE)
+                dec_cn = pkcs7_unpadding(dec_cn, block_size)
 
-            self._crypto.finalize()
+            crypto.finalize()
         else:
-            dec_cn = self._crypto.decrypt(enc_cn)
+            dec_cn = crypto.decrypt(enc_cn)
 
         self._decrypted_cache.extend(dec_cn)
 
     def read(self, size: int = -1) -> Optional[bytes]:
         self._read_block(size)
 
+        decrypted_cache = self._decrypted_cache
         if size < 0:
-            data = bytes(self._decrypted_cache)
-            self._decrypted_cache.clear()
+            data = bytes(decrypted_cache)
+            decrypted_cache.clear()
         else:
-            data = bytes(self._decrypted_cache[:size])
-            self._decrypted_cache = self._decrypted_cache[size:]
+            data = bytes(decrypted_cache[:size])
+            del decrypted_cache[:size]
+        self._offset += len(data)
+        return data
+
+    def decrypt_bytes(self, data: bytes) -> bytes:
+        self._decrypt_block(data)
+
+        decrypted_cache = self._decrypted_cache
+        data = bytes(decrypted_cache)
+        decrypted_cache.clear()
         self._offset += len(data)
         return data
 
@@ -730,14 +900,10 @@ class AES256CBCDecryptIO(DecryptIO):
         return False
 
 
-def parse_head(head: bytes) -> Tuple[bytes, bytes, bytes, bytes]:
-    i = len(BAIDUPCS_PY_CRYPTO_MAGIC_CODE)
-    return (
-        head[:i],
-        head[i : i + 1],  # magic_code
-        head[i + 1 : i + 1 + 16],  # salt + random padding
-        head[i + 1 + 16 : i + 1 + 16 + 8],  # total_origin_len
-    )
+def parse_head(head: bytes) -> Tuple[bytes, bytes, bytes, int]:
+    """Return magic code, encrypt algorithm code, salt + random padding (or nonce_or_iv) and total_origin_len"""
+
+    return _HEAD_STRUCT.unpack_from(head)
 
 
 def _decryptio_version1(total_head: bytes, io: IO, encrypt_password: bytes) -> Optional[DecryptIO]:
@@ -747,9 +913,8 @@ def _decryptio_version1(total_head: bytes, io: IO, encrypt_password: bytes) -> O
         return None
 
     # Version 1
-    b_mc, magic_code, nonce_or_iv, total_origin_len_ = parse_head(total_head)
+    b_mc, magic_code, nonce_or_iv, total_origin_len = parse_head(total_head)
     b_mc = aes256cbc_decrypt(b_mc, encrypt_password, random_bytes(16, encrypt_password))
-    total_origin_len = u8x8_to_u64(total_origin_len_)
 
     if b_mc != BAIDUPCS_PY_CRYPTO_MAGIC_CODE:
         return None
@@ -778,15 +943,14 @@ def _decryptio_version3(total_head: bytes, io: IO, encrypt_password: bytes) -> O
 
     head = aes256cbc_decrypt(enc_head, encrypt_key_for_head, iv_for_head)
 
-    b_mc, magic_code, padding_salt, total_origin_len_ = parse_head(head)
-    total_origin_len = u8x8_to_u64(total_origin_len_)
-
-    salt = padding_salt[:8]
-    encrypt_key, nonce_or_iv = generate_key_iv(encrypt_password, salt, 32, 16)
+    b_mc, magic_code, padding_salt, total_origin_len = parse_head(head)
 
     if b_mc != BAIDUPCS_PY_CRYPTO_MAGIC_CODE:
         return None
 
+    salt = padding_salt[:8]
+    encrypt_key, nonce_or_iv = generate_key_iv(encrypt_password, salt, 32, 16)
+
     eio: DecryptIO
     if magic_code == SimpleEncryptIO.MAGIC_CODE:
         eio = SimpleDecryptIO(io, encrypt_key, nonce_or_iv, total_origin_len)
@@ -806,17 +970,20 @@ def to_decryptio(io: IO, encrypt_password: bytes):
     if not encrypt_password:
         return io
 
-    total_head = io.read(ENCRYPT_HEAD_LEN)
-    eio = _decryptio_version1(total_head, io, encrypt_password)
+    # Read the longest head at once and try the current version (Version 3) at first
+    total_head = io.read(PADDED_ENCRYPT_HEAD_WITH_SALT_LEN)
+    eio = _decryptio_version3(total_head, io, encrypt_password)
     if eio is not None:
         return eio
 
     # No support Version 2
 
-    total_head += io.read(PADDED_ENCRYPT_HEAD_WITH_SALT_LEN - ENCRYPT_HEAD_LEN)
-    eio = _decryptio_version3(total_head, io, encrypt_password)
-    if eio is not None:
-        return eio
+    # The content of Version 1 starts at `ENCRYPT_HEAD_LEN`
+    if len(total_head) >= ENCRYPT_HEAD_LEN:
+        io.seek(ENCRYPT_HEAD_LEN, 0)
+        eio = _decryptio_version1(total_head[:ENCRYPT_HEAD_LEN], io, encrypt_password)
+        if eio is not None:
+            return eio
 
     io.seek(0, 0)
     return io
@@ -838,6 +1005,9 @@ class AutoDecryptRequest:
         self._url = url
         self._headers = headers
         self._session = requests.session()
+        # The session merges its headers into every request, so only `Range` is given per request
+        if headers:
+            self._session.headers.update(headers)
         self._kwargs = kwargs
         self._max_chunk_size = max_chunk_size
         self._encrypt_password = encrypt_password
@@ -918,8 +1088,7 @@ class AutoDecryptRequest:
         self._parsed = True
 
     def _request(self, _range: Tuple[int, int]) -> Response:
-        headers = dict(self._headers or {})
-        headers["Range"] = "bytes={}-{}".format(*_range)
+        headers = {"Range": "bytes={}-{}".format(*_range)}
 
         while True:
             try:
@@ -995,15 +1164,17 @@ class AutoDecryptRequest:
         for _rg in ranges:
             with self._request(_rg) as resp:
                 stream = resp.raw
+                # `read1` (urllib3 >= 2) returns the bytes which are available without
+                # waiting to fill up the whole `READ_SIZE` buffer.
+                stream_read = getattr(stream, "read1", stream.read)
+                dio = self._dio if isinstance(self._dio, DecryptIO) else None
                 while True:
-                    buf = stream.read(READ_SIZE)
+                    buf = stream_read(READ_SIZE)
                     if not buf:
                         break
                     self._decrypted_count += len(buf)
-                    bio = BytesIO(buf)
-                    if self._dio is not None and isinstance(self._dio, DecryptIO):
-                        self._dio.set_io(bio)
-                        yield self._dio.read() or b""
+                    if dio is not None:
+                        yield dio.decrypt_bytes(buf)
                     else:
                         yield buf
 
@@ -1013,10 +1184,8 @@ class AutoDecryptRequest:
         Echo chunk has the length at most `self._max_chunk_size`.
         """
 
-        left = list(range(start, end, self._max_chunk_size))
-        left.append(end)
-        right = [i - 1 for i in left]
-        return [(s, e) for s, e in zip(left[:-1], right[1:])]
+        step = self._max_chunk_size
+        return [(s, min(s + step, end) - 1) for s in range(start, end, step)]
 
 
 class RangeRequestIO(IO):
@@ -1065,14 +1234,15 @@ class RangeRequestIO(IO):
 
         start, end = self._offset, self._offset + size
 
-        buf = b""
+        callback = self._callback
+        parts = []
         for b in self._auto_decrypt_request.read((start, end)):
-            buf += b
+            parts.append(b)
             self._offset += len(b)
             # Call callback
-            if self._callback:
-                self._callback(self._offset)
-        return buf
+            if callback:
+                callback(self._offset)
+        return b"".join(parts)
 
     def seek(self, offset: int, whence: int = 0) -> int:
         if whence == 0:
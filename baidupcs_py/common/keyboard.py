@@ -20,6 +20,9 @@ else:
 
 
 class KeyboardListener(threading.Thread):
+    # The interval (seconds) to check whether the main thread is alive
+    CHECK_INTERVAL = 0.5
+
     def __init__(self, on: Callable[[str], Any]):
         """Creates a KeyboardListener object that you can call to do various keyboard things."""
         super().__init__()
@@ -79,22 +82,26 @@ class KeyboardListener(threading.Thread):
 
         return vals.index(ord(c.decode("utf-8")))
 
-    def kbhit(self):
-        """Returns True if keyboard character was hit, False otherwise."""
+    def kbhit(self, timeout: float = 0):
+        """Returns True if keyboard character was hit in `timeout` seconds, False otherwise."""
         if os.name == "nt":
-            return msvcrt.kbhit()
+            deadline = time.monotonic() + timeout
+            while not msvcrt.kbhit():
+                if time.monotonic() >= deadline:
+                    return False
+                time.sleep(0.01)
+            return True
 
         else:
-            dr, dw, de = select([sys.stdin], [], [], 0)
+            dr, dw, de = select([sys.stdin], [], [], timeout)
             return dr != []
 
     def run(self):
         while True:
-            if self.kbhit():
+            # Block until a key is hit, but wake up periodically to check the main thread
+            if self.kbhit(timeout=self.CHECK_INTERVAL):
                 c = self.getch()
                 self._on(c)
-            else:
-                time.sleep(0.1)
 
             # Exit when main_thread exited
             if not self._mt.is_alive():
@@ -1,7 +1,8 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Iterable, Iterator, Tuple, Any
 
 import os
-from collections import OrderedDict
+import threading
+from functools import lru_cache
 
 import sqlite3
 
@@ -35,6 +36,12 @@ CREATE TABLE IF NOT EXISTS {RAPID_UPLOAD_TABLE}
 )
 """
 
+CREATE_RAPID_UPLOAD_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS idx_ru_filename ON {RAPID_UPLOAD_TABLE} (filename)",
+    f"CREATE INDEX IF NOT EXISTS idx_ru_record_time ON {RAPID_UPLOAD_TABLE} (record_time)",
+    f"CREATE INDEX IF NOT EXISTS idx_ru_content_md5 ON {RAPID_UPLOAD_TABLE} (content_md5)",
+]
+
 RAPID_UPLOAD_TABLE_COLS = [
     c.strip().split(" ", 1)[0] for c in CREATE_RAPID_UPLOAD_TABLE.split("\n") if c.startswith("    ")
 ]
@@ -62,15 +69,42 @@ VALUES (?,?,?,?,?,?,?,?,?,?,?)
 """
 
 
+def _iter_rows(c: sqlite3.Cursor) -> Iterator[Dict[str, Any]]:
+    for r in c:
+        yield dict(zip(RAPID_UPLOAD_TABLE_COLS, r))
+
+
 class RapidUploadInfo:
+    # The max number of rows buffered by `insert` in the `with` block
+    BUFFER_SIZE = 64
+
     def __init__(self, db_path: str):
         self._db_path = db_path
-        self._conn = sqlite3.connect(db_path)
+        # The connection can be shared by threads, and writes are guarded by `self._lock`
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+
+        # Rows of `insert` are buffered in the `with` block
+        self._buffering = False
+        self._buffer: List[Tuple[Any, ...]] = []
 
         c = self._conn.cursor()
+        c.execute("PRAGMA journal_mode=WAL")
+        c.execute("PRAGMA synchronous=NORMAL")
+        c.execute("PRAGMA temp_store=MEMORY")
         c.execute(CREATE_RAPID_UPLOAD_TABLE)
+        for sql in CREATE_RAPID_UPLOAD_INDEXES:
+            c.execute(sql)
         self._conn.commit()
 
+    def __enter__(self) -> "RapidUploadInfo":
+        self._buffering = True
+        return self
+
+    def __exit__(self, *exc):
+        self._buffering = False
+        self.flush()
+
     def insert(
         self,
         slice_md5: str,
@@ -85,26 +119,48 @@ class RapidUploadInfo:
         user_id: Optional[int] = None,
         user_name: Optional[str] = None,
     ):
-        """Insert a rapid upload info"""
+        """Insert a rapid upload info
 
-        c = self._conn.cursor()
-        c.execute(
-            INSERT_RAPID_UPLOAD,
-            (
-                filename,
-                localpath,
-                remotepath,
-                encrypt_password,
-                encrypt_type,
-                user_id,
-                user_name,
-                slice_md5,
-                content_md5,
-                content_crc32,
-                content_length,
-            ),
-        )
-        self._conn.commit()
+        In the `with` block, the info is buffered and committed with others.
+        """
+
+        with self._lock:
+            self._buffer.append(
+                (
+                    filename,
+                    localpath,
+                    remotepath,
+                    encrypt_password,
+                    encrypt_type,
+                    user_id,
+                    user_name,
+                    slice_md5,
+                    content_md5,
+                    content_crc32,
+                    content_length,
+                )
+            )
+            if not self._buffering or len(self._buffer) >= self.BUFFER_SIZE:
+                self.flush()
+
+    def insert_many(self, rows: Iterable[Tuple[Any, ...]]):
+        """Insert rapid upload infos in one transaction
+
+        Each row is in the column order of `INSERT_RAPID_UPLOAD`.
+        """
+
+        with self._lock:
+            c = self._conn.cursor()
+            c.executemany(INSERT_RAPID_UPLOAD, rows)
+            self._conn.commit()
+
+    def flush(self):
+        """Commit the buffered infos"""
+
+        with self._lock:
+            if self._buffer:
+                rows, self._buffer = self._buffer, []
+                self.insert_many(rows)
 
     def list(
         self,
@@ -125,12 +181,44 @@ class RapidUploadInfo:
         Default order by record_time and desc
         """
 
+        return list(
+            self.list_iter(
+                ids=ids,
+                by_filename=by_filename,
+                by_time=by_time,
+                by_size=by_size,
+                by_localpath=by_localpath,
+                by_remotepath=by_remotepath,
+                by_user_id=by_user_id,
+                by_user_name=by_user_name,
+                desc=desc,
+                limit=limit,
+                offset=offset,
+            )
+        )
+
+    def list_iter(
+        self,
+        ids: List[int] = [],
+        by_filename: bool = False,
+        by_time: bool = False,
+        by_size: bool = False,
+        by_localpath: bool = False,
+        by_remotepath: bool = False,
+        by_user_id: bool = False,
+        by_user_name: bool = False,
+        desc: bool = False,
+        limit: int = 0,
+        offset: int = -1,
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate records by condition, the same as `list` but not fetching all records at once"""
+
         if ids:
-            ids_str = ",".join([str(i) for i in ids])
-            sql = f"SELECT * FROM {RAPID_UPLOAD_TABLE} WHERE id IN ({ids_str})"
+            sql = f"SELECT * FROM {RAPID_UPLOAD_TABLE} WHERE id IN ({','.join('?' * len(ids))})"
             c = self._conn.cursor()
-            c.execute(sql)
-            return [OrderedDict(zip(RAPID_UPLOAD_TABLE_COLS, r)) for r in c.fetchall()]
+            c.execute(sql, ids)
+            yield from _iter_rows(c)
+            return
 
         if by_filename:
             condition = "order by filename"
@@ -153,17 +241,20 @@ class RapidUploadInfo:
         if desc:
             condition += " desc"
 
+        params = []
         if limit > 0:
-            condition += f" LIMIT {limit}"
+            condition += " LIMIT ?"
+            params.append(limit)
 
         if offset > 0:
-            condition += f" OFFSET {offset}"
+            condition += " OFFSET ?"
+            params.append(offset)
 
         sql = f"SELECT * FROM {RAPID_UPLOAD_TABLE} {condition}"
 
         c = self._conn.cursor()
-        c.execute(sql)
-        return [OrderedDict(zip(RAPID_UPLOAD_TABLE_COLS, r)) for r in c.fetchall()]
+        c.execute(sql, params)
+        yield from _iter_rows(c)
 
     def search(
         self,
@@ -174,46 +265,54 @@ class RapidUploadInfo:
         in_user_name: bool = False,
         in_md5: bool = False,
     ) -> List[Dict[str, Any]]:
-        keyword = keyword.replace("'", r"\'")
-
         conditions = []
         if in_filename:
-            conditions.append(f"filename LIKE '%{keyword}%'")
+            conditions.append("filename LIKE ?")
         if in_localpath:
-            conditions.append(f"localpath LIKE '%{keyword}%'")
+            conditions.append("localpath LIKE ?")
         if in_remotepath:
-            conditions.append(f"remotepath LIKE '%{keyword}%'")
+            conditions.append("remotepath LIKE ?")
         if in_user_name:
-            conditions.append(f"user_name LIKE '%{keyword}%'")
+            conditions.append("user_name LIKE ?")
         if in_md5:
-            conditions.append(f"content_md5 LIKE '%{keyword}%'")
+            conditions.append("content_md5 LIKE ?")
 
         if not conditions:
             conditions = [
-                f"filename LIKE '%{keyword}%'",
-                f"localpath LIKE '%{keyword}%'",
-                f"remotepath LIKE '%{keyword}%'",
-                f"user_name LIKE '%{keyword}%'",
-                f"content_md5 LIKE '%{keyword}%'",
+                "filename LIKE ?",
+                "localpath LIKE ?",
+                "remotepath LIKE ?",
+                "user_name LIKE ?",
+                "content_md5 LIKE ?",
             ]
 
         condition = "WHERE " + " OR ".join(conditions)
 
         if keyword:
             sql = f"SELECT * FROM {RAPID_UPLOAD_TABLE} {condition}"
+            params = [f"%{keyword}%"] * len(conditions)
         else:
             sql = f"SELECT * FROM {RAPID_UPLOAD_TABLE}"
+            params = []
 
         c = self._conn.cursor()
-        c.execute(sql)
-        return [OrderedDict(zip(RAPID_UPLOAD_TABLE_COLS, r)) for r in c.fetchall()]
+        c.execute(sql, params)
+        return list(_iter_rows(c))
 
     def delete(self, id: int):
         sql = f"DELETE FROM {RAPID_UPLOAD_TABLE} WHERE id = ?"
 
-        c = self._conn.cursor()
-        c.execute(sql, (id,))
-        self._conn.commit()
+        with self._lock:
+            c = self._conn.cursor()
+            c.execute(sql, (id,))
+            self._conn.commit()
+
+
+@lru_cache(maxsize=None)
+def _shared_rapiduploadinfo(db_path: str) -> RapidUploadInfo:
+    """The `RapidUploadInfo` of `db_path` shared by all `save_rapid_upload_info` calls"""
+
+    return RapidUploadInfo(db_path)
 
 
 def save_rapid_upload_info(
@@ -229,7 +328,7 @@ def save_rapid_upload_info(
     user_id: Optional[int] = None,
     user_name: Optional[str] = None,
 ):
-    rapiduploadinfo = RapidUploadInfo(rapiduploadinfo_file)
+    rapiduploadinfo = _shared_rapiduploadinfo(rapiduploadinfo_file)
     rapiduploadinfo.insert(
         slice_md5.lower(),
         content_md5.lower(),
@@ -2,6 +2,7 @@ from typing import Optional
 from typing_extensions import Literal, Final
 from pathlib import Path
 from os import PathLike
+from functools import lru_cache
 
 import logging
 from logging import Logger
@@ -14,6 +15,24 @@ DEFAULT_LOG_LEVEL: Final = "ERROR"
 _LOG_FORMAT = "%(asctime)-15s | %(levelname)s | %(module)s: %(message)s"
 
 
+@lru_cache(maxsize=None)
+def _formatter(fmt: str) -> logging.Formatter:
+    return logging.Formatter(fmt)
+
+
+@lru_cache(maxsize=None)
+def _file_handler(filename: Path, fmt: str) -> logging.FileHandler:
+    """The `FileHandler` shared by loggers which log to the same file"""
+
+    _dir = filename.parent
+    if not _dir.exists():
+        _dir.mkdir()
+
+    file_handler = logging.FileHandler(filename)
+    file_handler.setFormatter(_formatter(fmt))
+    return file_handler
+
+
 def get_logger(
     name: str,
     fmt: str = _LOG_FORMAT,
@@ -23,18 +42,15 @@ def get_logger(
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
+    # The logger has been set up by a previous call
+    if logger.handlers:
+        return logger
+
     stream_handler = logging.StreamHandler()  # stdout
-    stream_handler.setFormatter(logging.Formatter(fmt))
+    stream_handler.setFormatter(_formatter(fmt))
     logger.addHandler(stream_handler)
 
     if filename:
-        filename = Path(filename)
-        _dir = filename.parent
-        if not _dir.exists():
-            _dir.mkdir()
-
-        file_handler = logging.FileHandler(filename)
-        file_handler.setFormatter(logging.Formatter(fmt))
-        logger.addHandler(file_handler)
+        logger.addHandler(_file_handler(Path(filename).absolute(), fmt))
 
     return logger
@@ -16,7 +16,7 @@ def random_avail_port() -> int:
     """
 
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        # The port is assigned at `bind`, no need to `listen`
         s.bind(("127.0.0.1", 0))
-        s.listen()
         _, port = s.getsockname()
         return port
@@ -22,10 +22,38 @@ def is_dir(localpath: PathLike) -> bool:
 
 
 def walk(localpath: PathLike) -> Iterator[str]:
-    for root, _, files in os.walk(Path(localpath)):
-        r = Path(root)
-        for fl in files:
-            yield (r / fl).as_posix()
+    """Yield the posix paths of all files under `localpath`
+
+    Like `os.walk`, directories are walked top-down, symlinks to directories
+    are not followed and unreadable directories are ignored.
+    """
+
+    root = str(Path(localpath))
+    # `Path` drops the leading "./" of paths
+    stack = ["" if root == "." else (root if root.endswith(os.sep) else root + os.sep)]
+    while stack:
+        prefix = stack.pop()
+        try:
+            it = os.scandir(prefix or ".")
+        except OSError:
+            continue
+
+        dirs = []
+        with it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                path = prefix + entry.name
+                if not is_dir:
+                    yield path.replace(os.sep, "/") if IS_WIN else path
+                elif not entry.is_symlink():
+                    dirs.append(path + os.sep)
+
+        # Walk the sub-directories in the scanned order
+        stack.extend(reversed(dirs))
 
 
 def join_path(source: PathLike, dest: PathLike) -> str:
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Set
 
 from rich.progress import (
     Progress,
@@ -11,7 +11,31 @@ from rich.progress import (
     TaskID,
 )
 
-_progress = Progress(
+
+class _Progress(Progress):
+    """`Progress` which keeps a set of its task ids
+
+    `Progress.task_ids` copies all task ids to a list at each call.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._task_id_set: Set[TaskID] = set()
+
+    def add_task(self, *args, **kwargs) -> TaskID:
+        task_id = super().add_task(*args, **kwargs)
+        self._task_id_set.add(task_id)
+        return task_id
+
+    def remove_task(self, task_id: TaskID) -> None:
+        super().remove_task(task_id)
+        self._task_id_set.discard(task_id)
+
+    def has_task(self, task_id: TaskID) -> bool:
+        return task_id in self._task_id_set
+
+
+_progress = _Progress(
     SpinnerColumn(),
     TextColumn("[bold blue]{task.fields[title]}", justify="right"),
     BarColumn(bar_width=40),
@@ -38,4 +62,4 @@ def exit_progress_bar():
 def progress_task_exists(task_id: Optional[TaskID]) -> bool:
     if task_id is None:
         return False
-    return task_id in _progress.task_ids
+    return _progress.has_task(task_id)
@@ -1,14 +1,6 @@
 import random
 import copy
 
-cdef crypt(unsigned char *data, unsigned char *byte_map, int len_):
-    cdef unsigned int c
-
-    for i in range(len_):
-        c = data[i]
-        data[i] = byte_map[c]
-
-
 class SimpleCryptography:
     """Simple Cryptography
 
@@ -36,14 +28,11 @@ class SimpleCryptography:
         self._key = key
 
     def encrypt(self, data):
-        data = bytes(bytearray(data))  # copy
-        crypt(data, self._encrypt_byte_map, len(data))
-        return data
+        # `bytes.translate` maps all bytes by the table in one C loop
+        return bytes(data).translate(self._encrypt_byte_map)
 
     def decrypt(self, data):
-        data = bytes(bytearray(data))  # copy
-        crypt(data, self._decrypt_byte_map, len(data))
-        return data
+        return bytes(data).translate(self._decrypt_byte_map)
 
     def reset(self):
         pass
@@ -25,22 +25,22 @@ def format_time(seconds: int) -> str:
     return ft
 
 
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+
 def human_size(size: int) -> str:
-    s = float(size)
-    v = ""
-    t = ""
-    for t in ["B", "KB", "MB", "GB", "TB"]:
-        if s < 1024.0:
-            v = f"{s:3.1f}"
-            break
-        s /= 1024.0
+    # Each unit is 2^10 times of the previous one, so the unit is indexed by the bit length
+    idx = min((int(size).bit_length() - 1) // 10, 4) if size > 0 else 0
+    v = f"{size / (1 << (idx * 10)):3.1f}"
     if v.endswith(".0"):
         v = v[:-2]
-    return f"{v} {t}"
+    return f"{v} {_SIZE_UNITS[idx]}"
 
 
 _nums_set = set(string.digits + ".")
 
+_UNIT_SIZES = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
 
 def human_size_to_int(size_str: str) -> int:
     size_str = size_str.strip()
@@ -59,15 +59,9 @@ def human_size_to_int(size_str: str) -> int:
         return 0
 
     s = float(size_str[:i])
-    _s = s
 
     unit = size_str[i:].upper().replace(" ", "")
     if not unit:
-        return math.floor(_s)
-
-    for t in ["KB", "MB", "GB", "TB"]:
-        _s *= 1024
-        if unit == t or unit[0] == t[0]:
-            return math.floor(_s)
+        return math.floor(s)
 
-    return math.floor(s)
+    return math.floor(s * _UNIT_SIZES.get(unit[0], 1))
@@ -3,14 +3,22 @@ import os
 import io
 import sys
 import subprocess
+import hashlib
+import zlib
+import gzip
+import re
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 
 import requests
+import pytest
 
 from baidupcs_py.common import constant
 from baidupcs_py.common.number import u64_to_u8x8, u8x8_to_u64
-from baidupcs_py.common.path import join_path
+from baidupcs_py.common.path import join_path, walk
 from baidupcs_py.common.platform import IS_WIN
 from baidupcs_py.common.io import (
+    BAIDUPCS_PY_CRYPTO_MAGIC_CODE,
     PADDED_ENCRYPT_HEAD_WITH_SALT_LEN,
     total_len,
     ChunkIO,
@@ -21,6 +29,7 @@ from baidupcs_py.common.io import (
     AES256CBCEncryptIO,
     to_decryptio,
     rapid_upload_params,
+    rapid_upload_params2,
     EncryptType,
 )
 from baidupcs_py.common.crypto import (
@@ -31,15 +40,50 @@ from baidupcs_py.common.crypto import (
     _md5_cmd,
     calu_file_md5,
     calu_md5,
+    calu_crc32_and_md5,
     SimpleCryptography,
     ChaCha20Cryptography,
     AES256CBCCryptography,
+    aes256cbc_encrypt,
 )
 from baidupcs_py.common.localstorage import RapidUploadInfo
+from baidupcs_py.common.log import get_logger
 
 from baidupcs_py.utils import human_size, human_size_to_int
 
 
+@pytest.fixture(scope="session")
+def big_buf() -> bytes:
+    """100M plain data shared by the `*_time` tests"""
+
+    return b"a" * 1024 * 1024 * 100
+
+
+@pytest.fixture(scope="module")
+def key() -> bytes:
+    return os.urandom(32)
+
+
+@pytest.fixture(scope="session")
+def rand50m() -> bytes:
+    """50M random data shared by the encrypt io tests"""
+
+    return os.urandom(1024 * 1024 * 50)
+
+
+def _readinto_all(c, chunk_size: int = 4096) -> bytes:
+    """Read all data of `c` by `readinto` with a `chunk_size` buffer"""
+
+    data = bytearray()
+    mv = memoryview(bytearray(chunk_size))
+    while True:
+        n = c.readinto(mv)
+        if not n:
+            break
+        data += mv[:n]
+    return bytes(data)
+
+
 def test_join_path():
     a = "/foo"
     b = "bar"
@@ -58,6 +102,17 @@ def test_join_path():
     assert join_path(a, b) == "bar"
 
 
+def test_walk(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    for p in ["f1", "a/f2", "a/b/f3"]:
+        (tmp_path / p).write_bytes(b"")
+
+    root = tmp_path.as_posix()
+    assert sorted(walk(tmp_path)) == [root + "/a/b/f3", root + "/a/f2", root + "/f1"]
+    assert list(walk(tmp_path / "a" / "b")) == [root + "/a/b/f3"]
+    assert list(walk(tmp_path / "nonexist")) == []
+
+
 def test_padding_key():
     key = os.urandom(5)
     pad_key = padding_key(key, 10)
@@ -70,7 +125,7 @@ def test_padding_key():
     assert len(pad_key) == 12
 
 
-def test_generate_nonce_or_iv():
+def test_generate_nonce_or_iv(tmp_path):
     salt = os.urandom(20)
     buf = io.BytesIO(b"123456789")
 
@@ -85,20 +140,77 @@ def test_generate_nonce_or_iv():
     assert len(ni1) == 16
     assert ni1 == ni2
 
-
-def test_rangerequestio():
-    url = "http://mirror.arizona.edu/ubuntu/dists/xenial/Release.gpg"
+    # File backed io samples with `os.pread`
+    path = tmp_path / "temp-nonce-file"
+    path.write_bytes(b"123456789")
+    with path.open("rb") as fd:
+        ni3 = generate_nonce_or_iv(salt, fd)
+    assert ni1 == ni3
+
+    # The fileno of a gzip file is the compressed file, so its content is sampled
+    gz_path = tmp_path / "temp-nonce-file.gz"
+    gz_path.write_bytes(gzip.compress(b"123456789"))
+    with gzip.open(gz_path, "rb") as gz:
+        ni4 = generate_nonce_or_iv(salt, gz)
+    assert ni1 == ni4
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """Serve `self.server.payload` with the `Range` header support"""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        payload = self.server.payload
+        m = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if not m:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        start = int(m.group(1))
+        end = min(int(m.group(2) or len(payload) - 1), len(payload) - 1)
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(payload)}")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        self.wfile.write(payload[start : end + 1])
+
+
+@pytest.fixture(scope="module")
+def range_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    # Not a multiple of the chunk size
+    server.payload = os.urandom(200 * 1024 + 7)  # type: ignore
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_rangerequestio(range_server):
+    url = f"http://127.0.0.1:{range_server.server_address[1]}/"
     io = RangeRequestIO("GET", url, max_chunk_size=300)
 
-    b = b""
+    b = []
     while True:
         cn = io.read(300)
         if not cn:
             break
-        b += cn
+        b.append(cn)
 
     o = requests.get(url).content
-    assert b == o
+    assert b"".join(b) == o == range_server.payload
+
+    # Reads across the chunk boundaries
+    io = RangeRequestIO("GET", url, max_chunk_size=300)
+    assert io.read(299) == o[:299]
+    assert io.read(2) == o[299:301]
+    assert io.read() == o[301:]
 
 
 def test_calu_file_md5():
@@ -107,19 +219,49 @@ def test_calu_file_md5():
         return
 
     path = "temp-file"
-    fd = open(path, "w")
-    fd.write("asdf")
-
-    cp = subprocess.run(_md5_cmd(path), universal_newlines=True, stdout=subprocess.PIPE)
-    output = cp.stdout.strip()
-    print("calu_file_md5: cmd output:", output)
-
-    try:
-        r = calu_file_md5(path)
-        print("calu_file_md5:", r)
-    finally:
-        os.remove(path)
-    assert r
+    for content in (b"asdf", b""):
+        with open(path, "wb") as fd:
+            fd.write(content)
+
+        # The md5 command is the oracle
+        cp = subprocess.run(_md5_cmd(path), universal_newlines=True, stdout=subprocess.PIPE)
+        output = cp.stdout.strip()
+        print("calu_file_md5: cmd output:", output)
+
+        try:
+            r = calu_file_md5(path)
+            print("calu_file_md5:", r)
+        finally:
+            os.remove(path)
+        assert r == hashlib.md5(content).hexdigest()
+        assert r in output
+
+
+def test_calu_crc32_and_md5(tmp_path):
+    buf = os.urandom(3 * constant.OneM + 14)
+    crc32_v, md5_v = calu_crc32_and_md5(io.BytesIO(buf), constant.OneM)
+    assert crc32_v == zlib.crc32(buf)
+    assert md5_v == hashlib.md5(buf).hexdigest()
+
+    assert calu_crc32_and_md5(io.BytesIO(b""), constant.OneM) == (0, hashlib.md5().hexdigest())
+
+    # Mapped file from current position
+    path = tmp_path / "temp-crc32-md5-file"
+    path.write_bytes(buf)
+    with path.open("rb") as fd:
+        fd.read(14)
+        crc32_v, md5_v = calu_crc32_and_md5(fd, constant.OneM)
+        assert fd.read() == b""
+    assert crc32_v == zlib.crc32(buf[14:])
+    assert md5_v == hashlib.md5(buf[14:]).hexdigest()
+
+    # The fileno of a gzip file is the compressed file, so its content is read
+    gz_path = tmp_path / "temp-crc32-md5-file.gz"
+    gz_path.write_bytes(gzip.compress(buf))
+    with gzip.open(gz_path, "rb") as gz:
+        crc32_v, md5_v = calu_crc32_and_md5(gz, constant.OneM)
+    assert crc32_v == zlib.crc32(buf)
+    assert md5_v == hashlib.md5(buf).hexdigest()
 
 
 def test_simplecryptography():
@@ -159,41 +301,41 @@ def test_aescryptography():
     assert buf == dec
 
 
-def test_simplecryptography_time():
-    key = os.urandom(32)
+@pytest.mark.benchmark
+def test_simplecryptography_time(big_buf, key):
     c = SimpleCryptography(key)
-    buf = b"a" * 1024 * 1024 * 100
+    buf = big_buf
     start = time.time()
     c.encrypt(buf)
     end = time.time()
     print("100M:", end - start)
 
 
-def test_chacha20cryptography_time():
-    key = os.urandom(32)
+@pytest.mark.benchmark
+def test_chacha20cryptography_time(big_buf, key):
     nonce = os.urandom(16)
     c = ChaCha20Cryptography(key, nonce)
-    buf = b"a" * 1024 * 1024 * 100
+    buf = big_buf
     start = time.time()
     c.encrypt(buf)
     end = time.time()
     print("100M:", end - start)
 
 
-def test_aes256cbccryptography_time():
-    key = os.urandom(32)
+@pytest.mark.benchmark
+def test_aes256cbccryptography_time(big_buf, key):
     iv = os.urandom(16)
     c = AES256CBCCryptography(key, iv)
-    buf = b"a" * 1024 * 1024 * 100
+    buf = big_buf
     start = time.time()
     enc = c.encrypt(buf)
     end = time.time()
     print("100M:", end - start, len(enc))
 
 
-def test_noencryptio():
+def test_noencryptio(rand50m):
     key = b"123"
-    buf = os.urandom(1024 * 1024 * 50)
+    buf = rand50m
     c = io.BytesIO(buf)
     enc = c.read()
     d = to_decryptio(io.BytesIO(enc), key)
@@ -201,9 +343,9 @@ def test_noencryptio():
     assert buf == dec
 
 
-def test_simpleencryptio():
+def test_simpleencryptio(rand50m):
     key = b"123"
-    buf = os.urandom(1024 * 1024 * 50)
+    buf = rand50m
     bio = io.BytesIO(buf)
     c = SimpleEncryptIO(bio, key, len(buf))
     assert total_len(c) == len(buf) + PADDED_ENCRYPT_HEAD_WITH_SALT_LEN
@@ -214,9 +356,9 @@ def test_simpleencryptio():
     assert buf == dec
 
 
-def test_chacha20encryptio():
+def test_chacha20encryptio(rand50m):
     key = os.urandom(32)
-    buf = os.urandom(1024 * 1024 * 50)
+    buf = rand50m
     bio = io.BytesIO(buf)
     c = ChaCha20EncryptIO(bio, key, len(buf))
     assert total_len(c) == len(buf) + PADDED_ENCRYPT_HEAD_WITH_SALT_LEN
@@ -227,9 +369,9 @@ def test_chacha20encryptio():
     assert buf == dec
 
 
-def test_aes256cbcencryptio():
+def test_aes256cbcencryptio(rand50m):
     key = os.urandom(32)
-    buf = os.urandom(1024 * 1024 * 50 + 14)
+    buf = rand50m + os.urandom(14)
     bio = io.BytesIO(buf)
     c = AES256CBCEncryptIO(bio, key, len(buf))
 
@@ -246,68 +388,64 @@ def test_aes256cbcencryptio():
     # Encrypt
     # Assert length of Read(size), size > 0
     buf = os.urandom(1024 * 50)
-    bio = io.BytesIO(buf)
-    c = AES256CBCEncryptIO(bio, key, len(buf))
-    length = 0
-    while True:
-        d = c.read(1)
-        if not d:
-            break
-        assert len(d) == 1
-        length += 1
-    assert total_len(c) == padding_size(len(buf), 16) + PADDED_ENCRYPT_HEAD_WITH_SALT_LEN
-
+    c = AES256CBCEncryptIO(io.BytesIO(buf), key, len(buf))
+    for _ in range(64):
+        assert len(c.read(1)) == 1
+    enc = _readinto_all(c)
+    assert 64 + len(enc) == padding_size(len(buf), 16) + PADDED_ENCRYPT_HEAD_WITH_SALT_LEN
+
+    for size in (1024 * 50, 1024 * 50 + 14):
+        buf = os.urandom(size)
+        c = AES256CBCEncryptIO(io.BytesIO(buf), key, len(buf))
+        enc = _readinto_all(c)
+        assert len(enc) == total_len(c) == padding_size(len(buf), 16) + PADDED_ENCRYPT_HEAD_WITH_SALT_LEN
+
+        # Decrypt
+        # Assert length of Read(size), size > 0
+        dio = to_decryptio(io.BytesIO(enc), key)
+        dec = []
+        while True:
+            d = dio.read(1)
+            if not d:
+                break
+            assert len(d) == 1
+            dec.append(d)
+        assert b"".join(dec) == buf
+
+
+def test_decrypt_bytes():
+    key = os.urandom(32)
     buf = os.urandom(1024 * 50 + 14)
-    bio = io.BytesIO(buf)
-    c = AES256CBCEncryptIO(bio, key, len(buf))
-    length = 0
-    while True:
-        d = c.read(1)
-        if not d:
-            break
-        assert len(d) == 1
-        length += 1
-    assert total_len(c) == padding_size(len(buf), 16) + PADDED_ENCRYPT_HEAD_WITH_SALT_LEN
 
-    # Decrypt
-    # Assert length of Read(size), size > 0
-    buf = os.urandom(1024 * 50)
-    bio = io.BytesIO(buf)
-    c = AES256CBCEncryptIO(bio, key, len(buf))
-    enc = b""
-    while True:
-        d = c.read(1)
-        if not d:
-            break
-        enc += d
-    dio = to_decryptio(io.BytesIO(enc), key)
-    length = 0
-    while True:
-        d = dio.read(1)
-        if not d:
-            break
-        assert len(d) == 1
-        length += 1
-    assert length == len(buf)
+    for cls in (SimpleEncryptIO, ChaCha20EncryptIO, AES256CBCEncryptIO):
+        enc = cls(io.BytesIO(buf), key, len(buf)).read()
+        dio = to_decryptio(io.BytesIO(enc[:PADDED_ENCRYPT_HEAD_WITH_SALT_LEN]), key)
 
-    buf = os.urandom(1024 * 50 + 14)
+        chunks = []
+        for i in range(PADDED_ENCRYPT_HEAD_WITH_SALT_LEN, len(enc), 1000):
+            chunks.append(dio.decrypt_bytes(enc[i : i + 1000]))
+        assert b"".join(chunks) == buf
+
+
+def test_to_decryptio_version1():
+    pwd = padding_key(b"123", 32)
+    buf = os.urandom(100)
+
+    head = (
+        aes256cbc_encrypt(BAIDUPCS_PY_CRYPTO_MAGIC_CODE, pwd, random_bytes(16, pwd))
+        + SimpleEncryptIO.MAGIC_CODE
+        + b"\x00" * 16
+        + u64_to_u8x8(len(buf))
+    )
+    enc = head + SimpleCryptography(pwd).encrypt(buf)
+
+    dio = to_decryptio(io.BytesIO(enc), b"123")
+    assert dio.read() == buf
+
+    # Unencrypted content is returned as is
     bio = io.BytesIO(buf)
-    c = AES256CBCEncryptIO(bio, key, len(buf))
-    enc = b""
-    while True:
-        d = c.read(1)
-        if not d:
-            break
-        enc += d
-    dio = to_decryptio(io.BytesIO(enc), key)
-    length = 0
-    while True:
-        d = dio.read(1)
-        if not d:
-            break
-        assert len(d) == 1
-        length += 1
-    assert length == len(buf)
+    assert to_decryptio(bio, b"123") is bio
+    assert bio.read() == buf
 
 
 def test_linked_crypted_io():
@@ -324,22 +462,22 @@ def test_linked_crypted_io():
     dio = to_decryptio(eio, key)
 
     length = 0
-    dbuf = b""
+    chunks = []
     while True:
         d = dio.read(1)
         if not d:
             break
-        dbuf += d
+        chunks.append(d)
         assert len(d) == 1
         length += 1
 
     assert length == raw_len
-    assert dbuf == buf
+    assert b"".join(chunks) == buf
 
 
-def test_aes256cbcencryptio_uniq():
+def test_aes256cbcencryptio_uniq(rand50m):
     key = os.urandom(32)
-    buf = os.urandom(1024 * 1024 * 50)
+    buf = rand50m
 
     bio = io.BytesIO(buf)
     c = AES256CBCEncryptIO(bio, key, len(buf))
@@ -352,10 +490,16 @@ def test_aes256cbcencryptio_uniq():
 
     assert enc1 == enc2
 
+    # Reset in the middle of reading
+    c.reset()
+    c.read(PADDED_ENCRYPT_HEAD_WITH_SALT_LEN + 100)
+    c.reset()
+    assert _readinto_all(c, constant.OneM) == enc1
+
 
-def test_rapid_upload_params():
+def test_rapid_upload_params(rand50m):
     key = os.urandom(32)
-    buf = os.urandom(60 * constant.OneM)
+    buf = rand50m + os.urandom(10 * constant.OneM)
 
     eio = ChaCha20EncryptIO(io.BytesIO(buf), key, len(buf))
     enc0 = rapid_upload_params(eio)
@@ -366,6 +510,18 @@ def test_rapid_upload_params():
     assert enc0 == enc1
 
 
+def test_rapid_upload_params2(tmp_path):
+    buf = os.urandom(3 * constant.OneM + 14)
+
+    path = tmp_path / "temp-rapid-upload-file"
+    path.write_bytes(buf)
+    assert rapid_upload_params2(path) == rapid_upload_params(io.BytesIO(buf))
+
+    # Empty file can not be mapped
+    path.write_bytes(b"")
+    assert rapid_upload_params2(path) == rapid_upload_params(io.BytesIO(b""))
+
+
 def test_chunkio():
     f = io.BytesIO(b"0123")
     b = ChunkIO(f, 2)
@@ -385,6 +541,21 @@ def test_chunkio():
     assert b.tell() == 2
 
 
+def test_io_slots():
+    key = os.urandom(32)
+    buf = os.urandom(100)
+
+    assert not hasattr(ChunkIO(io.BytesIO(buf), 2), "__dict__")
+
+    for cls in (SimpleEncryptIO, ChaCha20EncryptIO, AES256CBCEncryptIO):
+        eio = cls(io.BytesIO(buf), key, len(buf))
+        assert not hasattr(eio, "__dict__")
+
+        dio = to_decryptio(io.BytesIO(eio.read()), key)
+        assert not hasattr(dio, "__dict__")
+        assert dio.read() == buf
+
+
 def test_u64_u8x8():
     i = 2**32
     b = u64_to_u8x8(i)
@@ -397,6 +568,11 @@ def test_random_bytes():
     b2 = random_bytes(32, "abc")
     assert b1 == b2
 
+    # Unhashable seed
+    assert random_bytes(32, bytearray(b"abc")) == random_bytes(32, b"abc")
+    # No seed
+    assert random_bytes(32) != random_bytes(32)
+
 
 def test_padding_size():
     i = 13
@@ -424,54 +600,56 @@ def test_generate_key_iv():
     assert iv == b"\x8b\xe2\x02\x8e\xee6j\x1cLv\xa2&\xa2\x8a\x1d\xfd"
 
 
-def test_localstorage():
-    db_path = "./test_rapid_upload.db"
-    db = RapidUploadInfo(db_path)
+def test_localstorage(tmp_path):
+    db = RapidUploadInfo(str(tmp_path / "test_rapid_upload.db"))
 
+    md5_sdfdf = calu_md5(b"sdfdf")
+    md5_ggg = calu_md5("ggg")
+
+    # Rows are in the column order of `INSERT_RAPID_UPLOAD`
     rows = [
         (
             "abc",
             "/localpath/abc",
             "/remotepath/abc",
-            calu_md5(b"sdfdf"),
-            calu_md5("ggg"),
-            0,
-            9599,
             b"pwd",
             "Simple",
             None,
             "peter",
+            md5_sdfdf,
+            md5_ggg,
+            0,
+            9599,
         ),
         (
             "ryhg",
             "/localpath/ryhg",
             "/remotepath/ryhg",
-            calu_md5(b"sdfdf"),
-            calu_md5("ggg"),
-            0,
-            959,
             b"pwd",
             "Simple",
             None,
             "tim",
+            md5_sdfdf,
+            md5_ggg,
+            0,
+            959,
         ),
         (
             "9553",
             "/localpath/9553",
             "/remotepath/9553",
-            calu_md5(b"sdfdf"),
-            calu_md5("ggg"),
-            0,
-            59,
             b"pwd",
             "Simple",
             None,
             "moo",
+            md5_sdfdf,
+            md5_ggg,
+            0,
+            59,
         ),
     ]
 
-    for r in rows:
-        db.insert(*r)
+    db.insert_many(rows)
 
     r = db.list(desc=False, limit=1, offset=1)
     for i in r:
@@ -487,6 +665,29 @@ def test_localstorage():
         print(i)
 
 
+def test_localstorage_buffered_insert(tmp_path):
+    db = RapidUploadInfo(str(tmp_path / "rapid_upload.db"))
+
+    with db:
+        for i in range(RapidUploadInfo.BUFFER_SIZE + 1):
+            db.insert(calu_md5(str(i)), calu_md5(str(i)), 0, i, filename=str(i))
+        # The first `BUFFER_SIZE` rows are flushed
+        assert len(db.list()) == RapidUploadInfo.BUFFER_SIZE
+    assert len(db.list()) == RapidUploadInfo.BUFFER_SIZE + 1
+
+    db.insert_many([("x'y", None, None, None, None, None, None, "s", "c", 0, 1)] * 2)
+    r = db.search("x'y", in_filename=True)
+    assert len(r) == 1
+    assert db.list(ids=[r[0]["id"], 1])[0]["filename"] == "0"
+    assert list(db.list_iter(by_size=True, limit=2)) == db.list(by_size=True, limit=2)
+
+
+def test_get_logger():
+    logger = get_logger("test-get-logger")
+    assert get_logger("test-get-logger") is logger
+    assert len(logger.handlers) == 1
+
+
 def test_human_size():
     s = constant.OneM * 10
 